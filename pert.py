@@ -1,26 +1,217 @@
 import tkinter as tk
 import tkinter.messagebox
 import customtkinter as ctk
+import itertools
+import json
 import math
+import os
+import queue
+import threading
+import time
 
 
 FONT_FA = ("B Nazanin", 16)
 FONT_FA_BOLD = ("B Nazanin", 16, "bold")
 
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".pert_persian")
+DIFF_BUCKET_SIZE = 256
+
+
+class Schedule:
+    """Earliest/latest event times of a network (critical path method)"""
+
+    def __init__(self, earliest, latest, duration, cyclic=()):
+        self.earliest = earliest
+        self.latest = latest
+        self.duration = duration
+        self.cyclic = set(cyclic)
+
+    def slack(self, start, end, days):
+        return self.latest[end] - days - self.earliest[start]
+
+
+def compute_schedule(nodes, activities):
+    """Forward and backward pass over (start, end, days) activities
+
+    Nodes on or after a cycle cannot be ordered; they are reported in
+    Schedule.cyclic and their times are meaningless.
+    """
+    nodes = list(nodes)
+    outgoing = {node: [] for node in nodes}
+    indegree = {node: 0 for node in nodes}
+    for start, end, days in activities:
+        outgoing[start].append((end, days))
+        indegree[end] += 1
+
+
+    order = [node for node in nodes if indegree[node] == 0]
+    for node in order:
+        for end, _ in outgoing[node]:
+            indegree[end] -= 1
+            if indegree[end] == 0:
+                order.append(end)
+
+
+    earliest = {node: 0 for node in nodes}
+    for node in order:
+        for end, days in outgoing[node]:
+            if earliest[node] + days > earliest[end]:
+                earliest[end] = earliest[node] + days
+    duration = max(earliest.values(), default=0)
+
+
+    latest = {node: duration for node in nodes}
+    for node in reversed(order):
+        for end, days in outgoing[node]:
+            if latest[end] - days < latest[node]:
+                latest[node] = latest[end] - days
+
+    cyclic = [node for node in nodes if indegree[node] > 0]
+    return Schedule(earliest, latest, duration, cyclic)
+
+
+class Subnetwork:
+    """A named, nestable group of nodes that can be collapsed into one summary node"""
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.nodes = []
+        self.collapsed = False
+        self.summary_node = None
+        self.summary_origin = None
+        self._members = None
+        self._schedule = None
+        if parent is not None:
+            parent.children.append(self)
+
+    def child(self, name):
+        """Returns the direct subgroup with this name, creating it if needed"""
+        for group in self.children:
+            if group.name == name:
+                return group
+        return Subnetwork(name, self)
+
+    def walk(self):
+        yield self
+        for group in self.children:
+            yield from group.walk()
+
+    def path(self):
+        names = []
+        group = self
+        while group.parent is not None:
+            names.append(group.name)
+            group = group.parent
+        return names[::-1]
+
+    def is_hidden(self):
+        """True when an enclosing group is collapsed"""
+        group = self.parent
+        while group is not None:
+            if group.collapsed:
+                return True
+            group = group.parent
+        return False
+
+    def add_node(self, node):
+        if node.group is not None:
+            node.group.remove_node(node)
+        self.nodes.append(node)
+        node.group = self
+        self.invalidate()
+
+    def remove_node(self, node):
+        if node in self.nodes:
+            self.nodes.remove(node)
+        node.group = None
+        self.invalidate()
+
+    def invalidate(self):
+        """Drops cached members and schedules of this group and its ancestors"""
+        group = self
+        while group is not None:
+            group._members = None
+            group._schedule = None
+            group = group.parent
+
+
+        # A collapsed summary shows the group's duration, so it must follow the change.
+        group = self
+        while group is not None:
+            if group.collapsed and group.summary_node is not None:
+                group.summary_node.set_text(group.summary_text())
+            group = group.parent
+
+    def summary_text(self):
+        return f"{self.name}\n{self.schedule().duration}"
+
+    def members(self):
+        """All nodes of this group and its subgroups"""
+        if self._members is None:
+            members = set(self.nodes)
+            for group in self.children:
+                members |= group.members()
+            self._members = members
+        return self._members
+
+    def internal_edges(self):
+        members = self.members()
+        return [
+            edge for node in members for edge in node.edges
+            if edge.proxy_for is None and edge.start_node is node and edge.end_node in members
+        ]
+
+    def schedule(self):
+        """Schedule of the activities inside this group, reused until its contents change"""
+        if self._schedule is None:
+            activities = [(edge.start_node, edge.end_node, int(edge.days)) for edge in self.internal_edges()]
+            self._schedule = compute_schedule(self.members(), activities)
+        return self._schedule
+
 
 class Node:
-    def __init__(self, canvas, x, y, text, node_type="normal"):
+    _uids = itertools.count(1)
+
+    def __init__(self, canvas, x, y, text, node_type="normal", draw=True, uid=None):
         self.canvas = canvas
         self.radius = 40
         self.depth = 10
         self.canvas_items = []
         self.node_type = node_type
-        self.create_3d_node(x, y, text)
+        self.uid = uid if uid is not None else next(Node._uids)
+        self.tag = f"node{self.uid}"
         self.x = x
         self.y = y
         self.text = text
+        self.text_id = None
         self.edges = []
         self.highlight_id = None
+        self.group = None
+        self.summary_of = None
+        if draw:
+            self.create_3d_node(x, y, text)
+
+    @property
+    def is_drawn(self):
+        return bool(self.canvas_items)
+
+    def draw(self):
+        if not self.is_drawn:
+            self.create_3d_node(self.x, self.y, self.text)
+
+    def set_text(self, text):
+        self.text = text
+        if self.text_id is not None:
+            self.canvas.itemconfig(self.text_id, text=text)
+
+    def undraw(self):
+        self.remove_highlight()
+        for item in self.canvas_items:
+            self.canvas.delete(item)
+        self.canvas_items = []
+        self.text_id = None
 
     def create_3d_node(self, x, y, text):
 
@@ -30,6 +221,9 @@ class Node:
         elif self.node_type == "end":
             main_color = "#F44336"
             outline_color = "#C62828"
+        elif self.node_type == "group":
+            main_color = "#7E57C2"
+            outline_color = "#4527A0"
         else:
             main_color = "#FFD700"
             outline_color = "#B8860B"
@@ -38,7 +232,8 @@ class Node:
         shadow = self.canvas.create_oval(
             x - self.radius + self.depth, y - self.radius + self.depth,
             x + self.radius + self.depth, y + self.radius + self.depth,
-            fill=outline_color, outline=outline_color, width=0
+            fill=outline_color, outline=outline_color, width=0,
+            tags=(self.tag,)
         )
         self.canvas_items.append(shadow)
 
@@ -46,7 +241,8 @@ class Node:
         main_circle = self.canvas.create_oval(
             x - self.radius, y - self.radius,
             x + self.radius, y + self.radius,
-            fill=main_color, outline=outline_color, width=2
+            fill=main_color, outline=outline_color, width=2,
+            tags=(self.tag,)
         )
         self.canvas_items.append(main_circle)
 
@@ -54,7 +250,8 @@ class Node:
         text_id = self.canvas.create_text(
             x, y, text=text,
             font=("B Nazanin", 20, "bold"),
-            fill="white"
+            fill="white",
+            tags=(self.tag,)
         )
         self.canvas_items.append(text_id)
         self.text_id = text_id
@@ -99,9 +296,11 @@ class Node:
 
 class Edge:
     edge_groups = {}
+    _uids = itertools.count(1)
 
-    def __init__(self, canvas, start_node, end_node, days):
+    def __init__(self, canvas, start_node, end_node, days, draw=True, proxy_for=None, uid=None):
         self.canvas = canvas
+        self.uid = uid if uid is not None else next(Edge._uids)
         self.start_node = start_node
         self.end_node = end_node
         self.days = days
@@ -109,15 +308,15 @@ class Edge:
         self.text_id = None
         self.arrow_id = None
         self.curve_points = []
+        self.edge_index = 0
+        self.proxy_for = proxy_for
+        self.proxy = None
 
+        self.start_node.edges.append(self)
+        self.end_node.edges.append(self)
 
-        node_pair = self.get_node_pair(start_node, end_node)
-        if node_pair not in Edge.edge_groups:
-            Edge.edge_groups[node_pair] = []
-        Edge.edge_groups[node_pair].append(self)
-        self.edge_index = len(Edge.edge_groups[node_pair]) - 1
-
-        self.draw()
+        if draw:
+            self.draw()
 
     @staticmethod
     def get_node_pair(node1, node2):
@@ -190,6 +389,18 @@ class Edge:
             return points
 
     def draw(self):
+        if self.line_id is not None:
+            return
+
+
+        node_pair = self.get_node_pair(self.start_node, self.end_node)
+        if node_pair not in Edge.edge_groups:
+            Edge.edge_groups[node_pair] = []
+        if self not in Edge.edge_groups[node_pair]:
+            used = {edge.edge_index for edge in Edge.edge_groups[node_pair]}
+            self.edge_index = next(i for i in itertools.count() if i not in used)
+            Edge.edge_groups[node_pair].append(self)
+
         self.curve_points = self.calculate_curve_points()
 
         if len(self.curve_points) < 2:
@@ -198,7 +409,7 @@ class Edge:
 
         self.line_id = self.canvas.create_line(
             *[coord for point in self.curve_points for coord in point],
-            width=3, fill="#4169E1", smooth=True
+            width=3, fill="#4169E1", smooth=True, tags=("edge_line",)
         )
 
 
@@ -223,61 +434,97 @@ class Edge:
 
 
         if len(self.curve_points) >= 2:
+            text_x, text_y = self.label_anchor()[:2]
 
-            if len(self.curve_points) == 2:
-                x1, y1 = self.curve_points[0]
-                x2, y2 = self.curve_points[1]
-                text_x = (x1 + x2) / 2
-                text_y = (y1 + y2) / 2
-
+            self.text_id = self.canvas.create_text(
+                text_x, text_y, text=str(self.days),
+                fill="#FF4500", font=("B Nazanin", 16, "bold"),
+                activefill="#FF0000", tags=("days",)
+            )
 
-                dx = x2 - x1
-                dy = y2 - y1
-                if dx == 0:
-                    text_x += 15
-                elif dy == 0:
-                    text_y += 15
-                else:
-                    perp_dx = -dy / math.hypot(dx, dy)
-                    perp_dy = dx / math.hypot(dx, dy)
-                    text_x += perp_dx * 15
-                    text_y += perp_dy * 15
+    def label_anchor(self):
+        """Default day label position plus unit normal and tangent for alternatives"""
+        if len(self.curve_points) == 2:
+            x1, y1 = self.curve_points[0]
+            x2, y2 = self.curve_points[1]
+            length = math.hypot(x2 - x1, y2 - y1) or 1
+            tan_x, tan_y = (x2 - x1) / length, (y2 - y1) / length
+            perp_x, perp_y = -tan_y, tan_x
+            if x2 == x1:
+                perp_x, perp_y = 1, 0
+            elif y2 == y1:
+                perp_x, perp_y = 0, 1
+            text_x = (x1 + x2) / 2 + perp_x * 15
+            text_y = (y1 + y2) / 2 + perp_y * 15
+            return text_x, text_y, perp_x, perp_y, tan_x, tan_y
+
+
+        max_dist = 0
+        text_point = self.curve_points[len(self.curve_points) // 2]
+
+        x1, y1 = self.curve_points[0]
+        x2, y2 = self.curve_points[-1]
+
+        for point in self.curve_points:
+            px, py = point
+            if x1 == x2:
+                dist = abs(px - x1)
+            elif y1 == y2:
+                dist = abs(py - y1)
             else:
-                max_dist = 0
-                text_point = self.curve_points[len(self.curve_points) // 2]
+                A = y2 - y1
+                B = x1 - x2
+                C = x2 * y1 - x1 * y2
+                dist = abs(A * px + B * py + C) / math.sqrt(A ** 2 + B ** 2)
 
-                x1, y1 = self.curve_points[0]
-                x2, y2 = self.curve_points[-1]
+            if dist > max_dist:
+                max_dist = dist
+                text_point = point
 
-                for point in self.curve_points:
-                    px, py = point
-                    if x1 == x2:
-                        dist = abs(px - x1)
-                    elif y1 == y2:
-                        dist = abs(py - y1)
-                    else:
+        text_x, text_y = text_point
 
-                        A = y2 - y1
-                        B = x1 - x2
-                        C = x2 * y1 - x1 * y2
-                        dist = abs(A * px + B * py + C) / math.sqrt(A ** 2 + B ** 2)
 
-                    if dist > max_dist:
-                        max_dist = dist
-                        text_point = point
+        # Normal points away from the chord, towards the outside of the curve.
+        length = math.hypot(x2 - x1, y2 - y1) or 1
+        tan_x, tan_y = (x2 - x1) / length, (y2 - y1) / length
+        perp_x, perp_y = -tan_y, tan_x
+        if (text_x - (x1 + x2) / 2) * perp_x + (text_y - (y1 + y2) / 2) * perp_y < 0:
+            perp_x, perp_y = -perp_x, -perp_y
+        return text_x, text_y, perp_x, perp_y, tan_x, tan_y
 
-                text_x, text_y = text_point
+    def highlight(self):
+        if self.line_id is not None:
+            self.canvas.itemconfig(self.line_id, fill="#00FF00", width=5)
 
-            self.text_id = self.canvas.create_text(
-                text_x, text_y, text=str(self.days),
-                fill="#FF4500", font=("B Nazanin", 16, "bold"),
-                activefill="#FF0000"
-            )
+    def remove_highlight(self):
+        if self.line_id is not None:
+            self.canvas.itemconfig(self.line_id, fill="#4169E1", width=3)
 
-        self.start_node.edges.append(self)
-        self.end_node.edges.append(self)
+    def undraw(self):
+        for item in (self.line_id, self.arrow_id, self.text_id):
+            if item is not None:
+                self.canvas.delete(item)
+        self.line_id = None
+        self.arrow_id = None
+        self.text_id = None
+
+
+        group = Edge.edge_groups.get(self.get_node_pair(self.start_node, self.end_node))
+        if group and self in group:
+            group.remove(self)
+
+    def detach(self):
+        """Removes the edge from the canvas and from both of its nodes"""
+        self.undraw()
+        if self in self.start_node.edges:
+            self.start_node.edges.remove(self)
+        if self in self.end_node.edges:
+            self.end_node.edges.remove(self)
 
     def update_position(self):
+        if self.line_id is None:
+            return
+
         self.curve_points = self.calculate_curve_points()
 
         if len(self.curve_points) < 2:
@@ -305,52 +552,544 @@ class Edge:
 
 
         if len(self.curve_points) >= 2 and self.text_id:
+            text_x, text_y = self.label_anchor()[:2]
+            self.canvas.coords(self.text_id, text_x, text_y)
 
-            if len(self.curve_points) == 2:
-                x1, y1 = self.curve_points[0]
-                x2, y2 = self.curve_points[1]
-                text_x = (x1 + x2) / 2
-                text_y = (y1 + y2) / 2
 
+class LabelPlacer:
+    """Moves node names and day labels off each other using a spatial hash of their boxes"""
 
-                dx = x2 - x1
-                dy = y2 - y1
-                if dx == 0:
-                    text_x += 15
-                elif dy == 0:
-                    text_y += 15
-                else:
-                    perp_dx = -dy / math.hypot(dx, dy)
-                    perp_dy = dx / math.hypot(dx, dy)
-                    text_x += perp_dx * 15
-                    text_y += perp_dy * 15
-            else:
+    CELL_SIZE = 64
+    STEPS = (18, -18, 36, -36, 60, -60)
 
-                max_dist = 0
-                text_point = self.curve_points[len(self.curve_points) // 2]
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.cells = {}
+        self.boxes = {}
+
+    def cells_of(self, box):
+        x1, y1, x2, y2 = box
+        size = self.CELL_SIZE
+        for cx in range(int(x1 // size), int(x2 // size) + 1):
+            for cy in range(int(y1 // size), int(y2 // size) + 1):
+                yield cx, cy
+
+    def insert(self, key, box):
+        self.discard(key)
+        self.boxes[key] = box
+        for cell in self.cells_of(box):
+            self.cells.setdefault(cell, set()).add(key)
+
+    def discard(self, key):
+        box = self.boxes.pop(key, None)
+        if box is None:
+            return
+        for cell in self.cells_of(box):
+            keys = self.cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.cells[cell]
+
+    def forget(self, obj):
+        for kind in ("circle", "name", "label"):
+            self.discard((kind, obj))
+
+    def collides(self, box, ignore):
+        x1, y1, x2, y2 = box
+        for cell in self.cells_of(box):
+            for key in self.cells.get(cell, ()):
+                if key in ignore:
+                    continue
+                ox1, oy1, ox2, oy2 = self.boxes[key]
+                if x1 < ox2 and ox1 < x2 and y1 < oy2 and oy1 < y2:
+                    return True
+        return False
+
+    def place(self, key, item, candidates, ignore=()):
+        """Puts item at the first free candidate, or the first one if all are taken"""
+        bbox = self.canvas.bbox(item)
+        if not bbox:
+            self.discard(key)
+            return
+        half_w = (bbox[2] - bbox[0]) / 2
+        half_h = (bbox[3] - bbox[1]) / 2
+        self.discard(key)
+
+
+        chosen = None
+        for x, y in candidates:
+            box = (x - half_w, y - half_h, x + half_w, y + half_h)
+            if not self.collides(box, ignore):
+                chosen = x, y, box
+                break
+        if chosen is None:
+            x, y = candidates[0]
+            chosen = x, y, (x - half_w, y - half_h, x + half_w, y + half_h)
+
+        x, y, box = chosen
+        self.canvas.coords(item, x, y)
+        self.insert(key, box)
+
+    def place_node_circle(self, node):
+        if not node.is_drawn:
+            self.forget(node)
+            return
+        r = node.radius
+        self.insert(("circle", node), (node.x - r, node.y - r, node.x + r, node.y + r))
 
-                x1, y1 = self.curve_points[0]
-                x2, y2 = self.curve_points[-1]
+    def place_node_name(self, node):
+        if not node.is_drawn:
+            return
+        offset = node.radius + 12
+        candidates = [(node.x, node.y), (node.x, node.y + offset), (node.x, node.y - offset)]
+        self.place(("name", node), node.text_id, candidates, ignore={("circle", node)})
 
-                for point in self.curve_points:
-                    px, py = point
-                    if x1 == x2:
-                        dist = abs(px - x1)
-                    elif y1 == y2:
-                        dist = abs(py - y1)
-                    else:
-                        A = y2 - y1
-                        B = x1 - x2
-                        C = x2 * y1 - x1 * y2
-                        dist = abs(A * px + B * py + C) / math.sqrt(A ** 2 + B ** 2)
+    def place_edge(self, edge):
+        if edge.text_id is None or len(edge.curve_points) < 2:
+            self.forget(edge)
+            return
+        x, y, perp_x, perp_y, tan_x, tan_y = edge.label_anchor()
+        candidates = [(x, y)]
+        for step in self.STEPS:
+            candidates.append((x + perp_x * step, y + perp_y * step))
+            candidates.append((x + tan_x * step, y + tan_y * step))
+        self.place(("label", edge), edge.text_id, candidates)
+
+    def update_around(self, node):
+        """Re-places the labels that move with node and any other label its circle now covers"""
+        self.place_node_circle(node)
+        circle = self.boxes.get(("circle", node))
+        if circle is not None:
+            x1, y1, x2, y2 = circle
+            covered = {key for cell in self.cells_of(circle) for key in self.cells.get(cell, ())}
+            for key in covered:
+                kind, obj = key
+                if obj is node or obj in node.edges or key not in self.boxes:
+                    continue
+                ox1, oy1, ox2, oy2 = self.boxes[key]
+                if not (x1 < ox2 and ox1 < x2 and y1 < oy2 and oy1 < y2):
+                    continue
+                if kind == "name":
+                    self.place_node_name(obj)
+                elif kind == "label":
+                    self.place_edge(obj)
+        self.place_node_name(node)
+        for edge in node.edges:
+            self.place_edge(edge)
+
+    def place_all(self, nodes, edges):
+        """One pass over the whole diagram; circles go in first so labels avoid every node"""
+        self.cells = {}
+        self.boxes = {}
+        for node in nodes:
+            self.place_node_circle(node)
+        for node in nodes:
+            self.place_node_name(node)
+        for edge in edges:
+            self.place_edge(edge)
+
+
+class ProjectState:
+    """Plain-data copy of a project that journal records are replayed onto"""
 
-                    if dist > max_dist:
-                        max_dist = dist
-                        text_point = point
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+        self.collapsed = set()
+
+    def apply(self, record):
+        # Every operation is idempotent in sequence, so replaying records that a
+        # snapshot already contains gives the same state.
+        op = record["op"]
+        uid = record.get("uid")
+        if op == "node_create":
+            self.nodes[uid] = {
+                "uid": uid, "text": record["text"], "type": record["type"],
+                "x": record["x"], "y": record["y"], "group": record.get("group", [])
+            }
+        elif op == "node_move":
+            if uid in self.nodes:
+                self.nodes[uid]["x"] = record["x"]
+                self.nodes[uid]["y"] = record["y"]
+        elif op == "node_group":
+            if uid in self.nodes:
+                self.nodes[uid]["group"] = record["group"]
+        elif op == "node_delete":
+            self.nodes.pop(uid, None)
+        elif op == "edge_create":
+            self.edges[uid] = {
+                "uid": uid, "start": record["start"], "end": record["end"], "days": record["days"]
+            }
+        elif op == "edge_days":
+            if uid in self.edges:
+                self.edges[uid]["days"] = record["days"]
+        elif op == "edge_delete":
+            self.edges.pop(uid, None)
+        elif op == "group_collapse":
+            self.collapsed.add(tuple(record["group"]))
+        elif op == "group_expand":
+            self.collapsed.discard(tuple(record["group"]))
+
+    def to_dict(self):
+        return {
+            "nodes": list(self.nodes.values()),
+            "edges": list(self.edges.values()),
+            "collapsed": [list(path) for path in self.collapsed]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.nodes = {node["uid"]: node for node in data.get("nodes", [])}
+        state.edges = {edge["uid"]: edge for edge in data.get("edges", [])}
+        state.collapsed = {tuple(path) for path in data.get("collapsed", [])}
+        return state
+
+
+class Journal:
+    """Append-only change log written in batches by a background thread
+
+    The Tk thread only puts records on a queue. The writer thread appends them
+    to the log, applies them to its own ProjectState and, every COMPACT_EVERY
+    records, writes that state as a snapshot and starts a new log.
+    """
+
+    BATCH_SIZE = 1000
+    FLUSH_INTERVAL = 0.5
+    RETRY_INTERVAL = 2.0
+    COMPACT_EVERY = 20000
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, directory=JOURNAL_DIR):
+        self.directory = directory
+        self.log_path = os.path.join(directory, "journal.log")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.state = ProjectState()
+        self.queue = queue.Queue()
+        self.records_since_snapshot = 0
+        self.log_file = None
+        self.thread = None
+        self.error = None
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def recover(self):
+        """Loads the snapshot and replays the log over it; call before start()"""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                self.state = ProjectState.from_dict(json.load(f))
+
+
+        count = 0
+        if os.path.exists(self.log_path):
+            good_size = 0
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line) if line.endswith(b"\n") else None
+                    except ValueError:
+                        record = None
+                    if record is None:
+                        break  # torn write from a crash; nothing after it is valid
+                    self.state.apply(record)
+                    good_size += len(line)
+                    count += 1
+
+
+            # Cut the torn tail so new records are not appended onto it.
+            if good_size != os.path.getsize(self.log_path):
+                with open(self.log_path, "r+b") as f:
+                    f.truncate(good_size)
+        self.records_since_snapshot = count
+        return self.state
+
+    def start(self):
+        self.log_file = open(self.log_path, "ab", buffering=0)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def record(self, op, **fields):
+        fields["op"] = op
+        self.queue.put(fields)
+
+    def flush(self):
+        """Waits for the writer; returns the write error while records are still unsaved"""
+        if self.thread is not None:
+            self.queue.put(self._FLUSH)
+            self.queue.join()
+        return self.error
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.queue.put(self._STOP)
+        self.thread.join()
+        self.thread = None
+        self.log_file.close()
+
+    def run(self):
+        while True:
+            batch = []
+            stop = False
+            items = 1
+            try:
+                first = self.queue.get(timeout=self.RETRY_INTERVAL if self.pending else None)
+            except queue.Empty:
+                first = self._FLUSH
+                items = 0
+            if first is self._STOP:
+                stop = True
+            elif first is not self._FLUSH:
+                batch.append(first)
+
+
+                # Collect more records for a short while so a drag becomes one write.
+                deadline = time.monotonic() + self.FLUSH_INTERVAL
+                while len(batch) < self.BATCH_SIZE:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self.queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    items += 1
+                    if item is self._STOP:
+                        stop = True
+                        break
+                    if item is self._FLUSH:
+                        break
+                    batch.append(item)
+
+            try:
+                with self.lock:
+                    # Records of a failed write are kept and retried ahead of newer ones.
+                    batch = self.pending + batch
+                    self.pending = []
+                    try:
+                        if batch:
+                            self.write(batch)
+                            self.error = None
+                    except Exception as exc:
+                        # Keep the writer alive so flush() never waits on a dead thread.
+                        self.pending = batch
+                        self.error = exc
+            finally:
+                for _ in range(items):
+                    self.queue.task_done()
+            if stop:
+                return
 
-                text_x, text_y = text_point
+    def write(self, batch):
+        # Only the last position of each node in a batch is worth keeping.
+        seen = set()
+        kept = []
+        for record in reversed(batch):
+            if record["op"] == "node_move":
+                if record["uid"] in seen:
+                    continue
+                seen.add(record["uid"])
+            kept.append(record)
+        kept.reverse()
+
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in kept).encode("utf-8")
+        fd = self.log_file.fileno()
+        offset = os.fstat(fd).st_size
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[self.log_file.write(view):]
+            os.fsync(fd)
+        except OSError:
+            # Cut off the partial batch so later records are not written after a torn line.
+            try:
+                os.ftruncate(fd, offset)
+                os.lseek(fd, offset, os.SEEK_SET)
+            except OSError:
+                pass
+            raise
+        for record in kept:
+            self.state.apply(record)
+
+        self.records_since_snapshot += len(kept)
+        if self.records_since_snapshot >= self.COMPACT_EVERY:
+            try:
+                self.compact()
+            except OSError:
+                pass  # the records are safe in the log; compaction is retried on the next batch
+
+    def rebase(self, state):
+        """Replaces the journal with a snapshot of state, e.g. when writes failed"""
+        with self.lock:
+            self.compact(state)
+            self.state = state
+            self.pending = []
+            self.error = None
+
+    def compact(self, state=None):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump((state or self.state).to_dict(), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+
+        self.log_file.close()
+        self.log_file = open(self.log_path, "wb", buffering=0)
+        self.records_since_snapshot = 0
+
+
+class ProjectDiff:
+    """Differences between a baseline and the current version of a project, keyed by uid"""
 
-            self.canvas.coords(self.text_id, text_x, text_y)
+    def __init__(self):
+        self.node_map = {}
+        self.matched = {}
+        self.added = []
+        self.removed = []
+        self.changed = {}
+        self.slack_shift = {}
+        self.became_critical = []
+        self.left_critical = []
+        self.duration_delta = 0
+        self.skipped_regions = 0
+
+
+def index_regions(state):
+    """Buckets nodes and activities by subnetwork path and uid range, each with an order-independent hash
+
+    The uid range keeps one edit from dirtying a whole flat (ungrouped) project.
+    """
+    regions = {}
+    for node in state.nodes.values():
+        key = (tuple(node["group"]), "n", node["uid"] // DIFF_BUCKET_SIZE)
+        region = regions.setdefault(key, [0, [], []])
+        region[0] = (region[0] + hash(("n", node["uid"], node["text"], node["type"]))) & 0xFFFFFFFFFFFFFFFF
+        region[1].append(node)
+    for edge in state.edges.values():
+        start = state.nodes.get(edge["start"])
+        key = (tuple(start["group"]) if start else (), "e", edge["uid"] // DIFF_BUCKET_SIZE)
+        region = regions.setdefault(key, [0, [], []])
+        content = ("e", edge["uid"], edge["start"], edge["end"], int(edge["days"]))
+        region[0] = (region[0] + hash(content)) & 0xFFFFFFFFFFFFFFFF
+        region[2].append(edge)
+    return regions
+
+
+def state_slack(state):
+    activities = [
+        (edge["start"], edge["end"], int(edge["days"])) for edge in state.edges.values()
+        if edge["start"] in state.nodes and edge["end"] in state.nodes
+    ]
+    schedule = compute_schedule(state.nodes, activities)
+    slack = {
+        edge["uid"]: schedule.slack(edge["start"], edge["end"], int(edge["days"]))
+        for edge in state.edges.values()
+        if edge["start"] in state.nodes and edge["end"] in state.nodes
+        and edge["start"] not in schedule.cyclic and edge["end"] not in schedule.cyclic
+    }
+    return schedule, slack
+
+
+def compare_activities(diff, edge, other):
+    diff.matched[edge["uid"]] = other["uid"]
+    delta = int(other["days"]) - int(edge["days"])
+    moved = (
+        diff.node_map.get(edge["start"]) != other["start"]
+        or diff.node_map.get(edge["end"]) != other["end"]
+    )
+    if delta or moved:
+        diff.changed[other["uid"]] = delta
+
+
+def diff_projects(base, current):
+    """Matches two ProjectStates by uid, then by name, and compares their schedules"""
+    diff = ProjectDiff()
+    base_regions = index_regions(base)
+    current_regions = index_regions(current)
+
+
+    # Regions with equal hashes hold identical records, so they match one to one.
+    base_nodes, base_edges, current_nodes, current_edges = [], [], [], []
+    for path, (digest, nodes, edges) in base_regions.items():
+        other = current_regions.get(path)
+        if other is not None and other[0] == digest:
+            diff.skipped_regions += 1
+            for node in nodes:
+                diff.node_map[node["uid"]] = node["uid"]
+            for edge in edges:
+                diff.matched[edge["uid"]] = edge["uid"]
+        else:
+            base_nodes += nodes
+            base_edges += edges
+    for path, (digest, nodes, edges) in current_regions.items():
+        other = base_regions.get(path)
+        if other is None or other[0] != digest:
+            current_nodes += nodes
+            current_edges += edges
+
+
+    current_uids = {node["uid"] for node in current_nodes}
+    unmatched = []
+    for node in base_nodes:
+        if node["uid"] in current_uids:
+            diff.node_map[node["uid"]] = node["uid"]
+        else:
+            unmatched.append(node)
+    # A name only identifies a node when it is unique among the leftovers on both sides.
+    matched_uids = set(diff.node_map.values())
+    by_name = {}
+    for node in current_nodes:
+        if node["uid"] not in matched_uids:
+            by_name.setdefault(node["text"], []).append(node["uid"])
+    base_names = {}
+    for node in unmatched:
+        base_names[node["text"]] = base_names.get(node["text"], 0) + 1
+    for node in unmatched:
+        candidates = by_name.get(node["text"])
+        if candidates and len(candidates) == 1 and base_names[node["text"]] == 1:
+            diff.node_map[node["uid"]] = candidates[0]
+
+
+    pending = {edge["uid"]: edge for edge in current_edges}
+    unmatched = []
+    for edge in base_edges:
+        other = pending.pop(edge["uid"], None)
+        if other is None:
+            unmatched.append(edge)
+        else:
+            compare_activities(diff, edge, other)
+    by_pair = {}
+    for other in pending.values():
+        by_pair.setdefault((other["start"], other["end"]), []).append(other)
+    for edge in unmatched:
+        candidates = by_pair.get((diff.node_map.get(edge["start"]), diff.node_map.get(edge["end"])))
+        if candidates:
+            compare_activities(diff, edge, candidates.pop(0))
+        else:
+            diff.removed.append(edge["uid"])
+    diff.added = [other["uid"] for candidates in by_pair.values() for other in candidates]
+
+
+    base_schedule, base_slack = state_slack(base)
+    current_schedule, current_slack = state_slack(current)
+    diff.duration_delta = current_schedule.duration - base_schedule.duration
+    for base_uid, current_uid in diff.matched.items():
+        old = base_slack.get(base_uid)
+        new = current_slack.get(current_uid)
+        if old != new:
+            diff.slack_shift[current_uid] = (old, new)
+            if new == 0:
+                diff.became_critical.append(current_uid)
+            elif old == 0:
+                diff.left_critical.append(base_uid)
+    diff.became_critical += [uid for uid in diff.added if current_slack.get(uid) == 0]
+    diff.left_critical += [uid for uid in diff.removed if base_slack.get(uid) == 0]
+    return diff
 
 
 class PERTApp:
@@ -359,8 +1098,18 @@ class PERTApp:
         self.edges = []
         self.dragged_node = None
         self.selected_node = None
+        self.selected_edge = None
         self.start_node = None
         self.end_node = None
+        self.root_group = Subnetwork("پروژه")
+        self.gantt_window = None
+
+
+        self.journal = Journal()
+        state = self.journal.recover()
+        Node._uids = itertools.count(max(state.nodes, default=0) + 1)
+        Edge._uids = itertools.count(max(state.edges, default=0) + 1)
+        self.journal.start()
 
         self.root = ctk.CTk()
         self.root.title("سازنده نمودار پرت")
@@ -490,6 +1239,9 @@ class PERTApp:
         self.graph_window = None
         self.update_input_states()
 
+        self.journal_error_shown = False
+        self.root.after(2000, self.poll_journal)
+
     def update_input_states(self):
         """Enable/disable input fields based on whether start/end nodes exist"""
         self.start_node_entry.configure(state="normal" if self.start_node is None else "disabled")
@@ -520,16 +1272,14 @@ class PERTApp:
         if self.start_node is None:
             start_name = self.start_node_entry.get().strip()
             self.start_node = Node(self.graph_window.canvas, 200, 150, start_name, "start")
-            self.nodes.append(self.start_node)
-            self.make_draggable(self.start_node)
+            self.register_node(self.start_node)
             self.start_node_entry.delete(0, tk.END)
 
 
         if self.end_node is None:
             end_name = self.end_node_entry.get().strip()
             self.end_node = Node(self.graph_window.canvas, 600, 150, end_name, "end")
-            self.nodes.append(self.end_node)
-            self.make_draggable(self.end_node)
+            self.register_node(self.end_node)
             self.end_node_entry.delete(0, tk.END)
 
 
@@ -542,8 +1292,7 @@ class PERTApp:
                 x = start_x + (i % 3) * spacing
                 y = start_y + (i // 3) * spacing
                 new_node = Node(self.graph_window.canvas, x, y, name)
-                self.nodes.append(new_node)
-                self.make_draggable(new_node)
+                self.register_node(new_node)
 
             self.node_entry.delete(0, tk.END)
 
@@ -552,15 +1301,149 @@ class PERTApp:
     def open_graph_window(self):
         if not self.graph_window:
             self.graph_window = GraphWindow(self)
+            self.restore_project()
         self.root.wait_window(self.graph_window.top)
         self.graph_window = None
 
-    def make_draggable(self, node):
+    def restore_project(self):
+        """Rebuilds the diagram from the journal, e.g. after a crash or closing the graph window"""
+        self.flush_journal()
+        state = self.journal.state
+        if not state.nodes or self.nodes:
+            return
+        canvas = self.graph_window.canvas
+
+
+        by_uid = {}
+        for data in state.nodes.values():
+            node = Node(canvas, data["x"], data["y"], data["text"], data["type"], draw=False, uid=data["uid"])
+            by_uid[node.uid] = node
+            self.nodes.append(node)
+            self.make_draggable(node)
+            self.group_at(data["group"]).add_node(node)
+            if node.node_type == "start":
+                self.start_node = node
+            elif node.node_type == "end":
+                self.end_node = node
+
+        for data in state.edges.values():
+            start = by_uid.get(data["start"])
+            end = by_uid.get(data["end"])
+            if start is None or end is None:
+                continue
+            self.edges.append(Edge(canvas, start, end, data["days"], draw=False, uid=data["uid"]))
+
+
+        # Collapse before drawing so hidden internals never get canvas items.
+        for path in sorted(state.collapsed, key=len):
+            group = self.group_at(path)
+            if group.parent is not None and group.members():
+                self.fold_group(group)
+        self.refresh_group(self.root_group, place_labels=False)
+        shown = [node for node in self.nodes if node.is_drawn]
+        shown += [group.summary_node for group in self.root_group.walk() if group.summary_node and group.summary_node.is_drawn]
+        edges = dict.fromkeys(edge for node in shown for edge in node.edges if edge.text_id is not None)
+        self.graph_window.labels.place_all(shown, edges)
+        self.update_input_states()
+        self.schedule_changed()
+
+    def poll_journal(self):
+        """Reports a failing autosave once, while the user can still act on it"""
+        if self.journal.error is None:
+            self.journal_error_shown = False
+        elif not self.journal_error_shown:
+            self.journal_error_shown = True
+            tkinter.messagebox.showwarning(
+                title='خطای ذخیره خودکار',
+                message=f'ذخیره خودکار تغییرات ناموفق بود و دوباره تلاش می‌شود:\n{self.journal.error}'
+            )
+        self.root.after(2000, self.poll_journal)
+
+    def save_before_close(self):
+        """Makes sure the journal holds the whole project; False if it could not be saved"""
+        if self.journal.flush() is None:
+            return True
+        try:
+            self.journal.rebase(self.export_state())
+        except OSError as exc:
+            tkinter.messagebox.showwarning(
+                title='خطای ذخیره خودکار',
+                message=f'تغییرات ذخیره نشد و پنجره نمودار باز می‌ماند:\n{exc}'
+            )
+            return False
+        return True
+
+    def flush_journal(self):
+        error = self.journal.flush()
+        if error is not None:
+            tkinter.messagebox.showwarning(
+                title='خطای ذخیره خودکار',
+                message=f'ذخیره خودکار تغییرات ناموفق بود:\n{error}'
+            )
 
-        for item in node.canvas_items:
-            self.canvas_tag_bind(item, "<ButtonPress-1>", lambda e, n=node: self.start_drag(e, n))
-            self.canvas_tag_bind(item, "<B1-Motion>", self.do_drag)
-            self.canvas_tag_bind(item, "<ButtonRelease-1>", self.stop_drag)
+    def reset_project(self):
+        """Forgets the in-memory diagram; the journal still has it"""
+        self.nodes = []
+        self.edges = []
+        self.dragged_node = None
+        self.selected_node = None
+        self.selected_edge = None
+        self.start_node = None
+        self.end_node = None
+        self.root_group = Subnetwork("پروژه")
+        self.update_input_states()
+
+    def export_state(self):
+        state = ProjectState()
+        for node in self.nodes:
+            state.nodes[node.uid] = {
+                "uid": node.uid, "text": node.text, "type": node.node_type,
+                "x": node.x, "y": node.y, "group": node.group.path()
+            }
+        for edge in self.edges:
+            state.edges[edge.uid] = {
+                "uid": edge.uid, "start": edge.start_node.uid, "end": edge.end_node.uid, "days": edge.days
+            }
+        state.collapsed = {tuple(group.path()) for group in self.root_group.walk() if group.collapsed}
+        return state
+
+    def baseline_path(self):
+        return os.path.join(self.journal.directory, "baseline.json")
+
+    def save_baseline(self):
+        with open(self.baseline_path(), "w", encoding="utf-8") as f:
+            json.dump(self.export_state().to_dict(), f, ensure_ascii=False)
+
+    def load_baseline(self):
+        if not os.path.exists(self.baseline_path()):
+            return None
+        with open(self.baseline_path(), encoding="utf-8") as f:
+            return ProjectState.from_dict(json.load(f))
+
+    def group_at(self, path):
+        group = self.root_group
+        for name in path:
+            group = group.child(name)
+        return group
+
+    def register_node(self, node, group=None):
+        self.nodes.append(node)
+        self.make_draggable(node)
+        group = group or self.root_group
+        group.add_node(node)
+        self.graph_window.labels.update_around(node)
+        self.journal.record(
+            "node_create", uid=node.uid, text=node.text, type=node.node_type,
+            x=node.x, y=node.y, group=group.path()
+        )
+
+    def make_draggable(self, node):
+        """Binds on the node's tag so the bindings survive redrawing a hidden node"""
+        self.canvas_tag_bind(node.tag, "<ButtonPress-1>", lambda e, n=node: self.start_drag(e, n))
+        self.canvas_tag_bind(node.tag, "<B1-Motion>", self.do_drag)
+        self.canvas_tag_bind(node.tag, "<ButtonRelease-1>", self.stop_drag)
+        if node.summary_of is not None:
+            self.canvas_tag_bind(node.tag, "<Double-Button-1>", lambda e, g=node.summary_of: self.expand_group(g))
 
     def canvas_tag_bind(self, tag, sequence, func):
         """Helper method to bind events to canvas tags"""
@@ -584,36 +1467,113 @@ class PERTApp:
             new_x = self.dragged_node.x + dx
             new_y = self.dragged_node.y + dy
             self.dragged_node.move(new_x, new_y)
+            self.graph_window.labels.update_around(self.dragged_node)
+            if self.dragged_node.summary_of is None:
+                self.journal.record("node_move", uid=self.dragged_node.uid, x=new_x, y=new_y)
             self.drag_start_x = event.x
             self.drag_start_y = event.y
 
     def stop_drag(self, event):
         self.dragged_node = None
+        if self.graph_window.diff is not None:
+            self.graph_window.draw_diff()
+
+    def creates_cycle(self, start_node, end_node):
+        """True when end_node already reaches start_node through real edges"""
+        seen = {end_node}
+        stack = [end_node]
+        while stack:
+            node = stack.pop()
+            if node is start_node:
+                return True
+            for edge in node.edges:
+                if edge.proxy_for is None and edge.start_node is node and edge.end_node not in seen:
+                    seen.add(edge.end_node)
+                    stack.append(edge.end_node)
+        return False
+
+    def add_edge(self, start_node, end_node, days):
+        if self.creates_cycle(start_node, end_node):
+            tkinter.messagebox.showwarning(title='خطای یال', message='این یال یک حلقه در نمودار ایجاد می‌کند')
+            return None
+        edge = Edge(self.graph_window.canvas, start_node, end_node, days)
+        self.edges.append(edge)
+        self.graph_window.labels.place_edge(edge)
+        start_node.group.invalidate()
+        end_node.group.invalidate()
+        self.journal.record("edge_create", uid=edge.uid, start=start_node.uid, end=end_node.uid, days=days)
+        self.schedule_changed()
+        return edge
+
+    def set_edge_days(self, edge, days):
+        edge.days = days
+        for shown in (edge, edge.proxy):
+            if shown is not None and shown.text_id is not None:
+                shown.days = days
+                shown.canvas.itemconfig(shown.text_id, text=str(days))
+                self.graph_window.labels.place_edge(shown)
+        edge.start_node.group.invalidate()
+        edge.end_node.group.invalidate()
+        self.journal.record("edge_days", uid=edge.uid, days=days)
+        self.schedule_changed()
+
+    def delete_edge(self, edge):
+        if edge is self.selected_edge:
+            self.select_edge(None)
+        labels = self.graph_window.labels
+        if edge.proxy is not None:
+            edge.proxy.detach()
+            labels.forget(edge.proxy)
+            edge.proxy = None
+        edge.detach()
+        labels.forget(edge)
+        if edge in self.edges:
+            self.edges.remove(edge)
+        edge.start_node.group.invalidate()
+        edge.end_node.group.invalidate()
+        self.journal.record("edge_delete", uid=edge.uid)
+        self.schedule_changed()
+
+    def select_edge(self, edge):
+        """Highlights an activity in the network and, when open, in the Gantt view"""
+        for shown in (self.selected_edge, self.selected_edge and self.selected_edge.proxy):
+            if shown is not None:
+                shown.remove_highlight()
+        self.selected_edge = edge
+        for shown in (edge, edge and edge.proxy):
+            if shown is not None:
+                shown.highlight()
+        if self.gantt_window is not None:
+            self.gantt_window.show_edge(edge)
+
+    def schedule_changed(self):
+        if self.gantt_window is not None:
+            self.gantt_window.request_reload()
+        if self.graph_window is not None:
+            self.graph_window.request_diff_refresh()
+
+    def open_gantt_window(self):
+        if self.gantt_window is None:
+            self.gantt_window = GanttWindow(self)
+        else:
+            self.gantt_window.top.lift()
 
     def delete_node(self, node):
-        if node is None:
+        if node is None or node.summary_of is not None:
             return
 
 
-        edges_to_remove = []
-        for edge in self.edges[:]:
-            if edge.start_node == node or edge.end_node == node:
-                edges_to_remove.append(edge)
-
-        for edge in edges_to_remove:
-            self.graph_window.canvas.delete(edge.line_id)
-            self.graph_window.canvas.delete(edge.text_id)
-            self.graph_window.canvas.delete(edge.arrow_id)
-            if edge in self.edges:
-                self.edges.remove(edge)
+        for edge in [edge for edge in node.edges if edge.proxy_for is None]:
+            self.delete_edge(edge)
 
 
-        for item in node.canvas_items:
-            self.graph_window.canvas.delete(item)
-        if node.highlight_id:
-            self.graph_window.canvas.delete(node.highlight_id)
+        node.undraw()
+        self.graph_window.labels.forget(node)
+        if node.group is not None:
+            node.group.remove_node(node)
         if node in self.nodes:
             self.nodes.remove(node)
+        self.journal.record("node_delete", uid=node.uid)
 
 
         if node == self.start_node:
@@ -624,6 +1584,149 @@ class PERTApp:
         self.selected_node = None
         self.update_input_states()
 
+    def assign_group(self, node, path):
+        """Moves a node into the subnetwork at path (names from the top level down)"""
+        if node.summary_of is not None:
+            return
+        old_group = node.group
+        group = self.group_at(path)
+        if group is old_group:
+            return
+        group.add_node(node)
+        self.journal.record("node_group", uid=node.uid, group=group.path())
+        self.refresh_group(old_group)
+        self.refresh_group(group)
+
+    def visible_node(self, node):
+        """The node itself, or the summary of its outermost collapsed group"""
+        visible = node
+        group = node.group
+        while group is not None:
+            if group.collapsed:
+                visible = self.summary_node(group)
+            group = group.parent
+        return visible
+
+    def summary_node(self, group):
+        if group.summary_node is None:
+            summary = Node(self.graph_window.canvas, 0, 0, group.name, "group", draw=False)
+            summary.summary_of = group
+            self.make_draggable(summary)
+            group.summary_node = summary
+        return group.summary_node
+
+    def collapse_group(self, group):
+        if group.parent is None or group.collapsed or group.is_hidden():
+            return
+        if not group.members():
+            return
+        self.fold_group(group)
+        self.refresh_group(group)
+        self.journal.record("group_collapse", group=group.path())
+
+    def fold_group(self, group):
+        """Marks group collapsed with its summary node at the centre of its members"""
+        members = group.members()
+        cx = sum(node.x for node in members) / len(members)
+        cy = sum(node.y for node in members) / len(members)
+        summary = self.summary_node(group)
+        summary.x, summary.y = cx, cy
+        summary.set_text(group.summary_text())
+        group.summary_origin = (cx, cy)
+        group.collapsed = True
+
+    def expand_group(self, group):
+        if not group.collapsed:
+            return
+
+
+        # Internals follow wherever the summary node was dragged to.
+        summary = group.summary_node
+        dx = summary.x - group.summary_origin[0]
+        dy = summary.y - group.summary_origin[1]
+        if dx or dy:
+            for node in group.members():
+                node.move(node.x + dx, node.y + dy)
+                self.journal.record("node_move", uid=node.uid, x=node.x, y=node.y)
+            for sub in group.walk():
+                if sub is not group and sub.collapsed:
+                    sub.summary_node.move(sub.summary_node.x + dx, sub.summary_node.y + dy)
+                    sub.summary_origin = (sub.summary_origin[0] + dx, sub.summary_origin[1] + dy)
+        self.graph_window.labels.forget(summary)
+        group.collapsed = False
+        self.refresh_group(group)
+        self.journal.record("group_expand", group=group.path())
+
+    def refresh_group(self, group, place_labels=True):
+        """Creates canvas items for what is visible in group and deletes the rest"""
+        if group is None:
+            return
+        members = group.members()
+        labels = self.graph_window.labels
+        shown = []
+
+
+        for node in members:
+            if self.visible_node(node) is node:
+                node.draw()
+                shown.append(node)
+            else:
+                node.undraw()
+                labels.forget(node)
+                if node is self.selected_node:
+                    self.selected_node = None
+
+
+        for sub in group.walk():
+            summary = sub.summary_node
+            if summary is None:
+                continue
+            if sub.collapsed and not sub.is_hidden() and sub.members():
+                summary.draw()
+                shown.append(summary)
+            else:
+                summary.undraw()
+                labels.forget(summary)
+                if summary is self.selected_node:
+                    self.selected_node = None
+
+
+        edges = {edge for node in members for edge in node.edges if edge.proxy_for is None}
+        for edge in edges:
+            self.refresh_edge(edge)
+        if place_labels:
+            for node in shown:
+                labels.update_around(node)
+        self.graph_window.request_diff_refresh()
+
+    def refresh_edge(self, edge):
+        """Draws an edge, or a proxy to the summary node standing in for a hidden end"""
+        labels = self.graph_window.labels
+        if edge.proxy is not None:
+            edge.proxy.detach()
+            labels.forget(edge.proxy)
+            edge.proxy = None
+        start = self.visible_node(edge.start_node)
+        end = self.visible_node(edge.end_node)
+        if start is edge.start_node and end is edge.end_node:
+            edge.draw()
+            return
+        edge.undraw()
+        labels.forget(edge)
+        if start is not end:
+            edge.proxy = Edge(self.graph_window.canvas, start, end, edge.days, proxy_for=edge)
+            if edge is self.selected_edge:
+                edge.proxy.highlight()
+
+    def toggle_selected_group(self):
+        node = self.selected_node
+        if node is None:
+            return
+        if node.summary_of is not None:
+            self.expand_group(node.summary_of)
+        elif node.group is not None:
+            self.collapse_group(node.group)
+
 
 class GraphWindow:
     def __init__(self, pert_app):
@@ -650,6 +1753,7 @@ class GraphWindow:
             highlightthickness=0
         )
         self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.labels = LabelPlacer(self.canvas)
 
 
         self.control_frame = ctk.CTkFrame(self.container)
@@ -686,11 +1790,72 @@ class GraphWindow:
         )
         self.delete_btn.pack(side="left", padx=5, pady=5)  # Left side for RTL
 
+
+        self.group_btn = ctk.CTkButton(
+            self.control_frame,
+            text="گروه‌بندی گره",
+            command=self.group_selected,
+            font=FONT_FA_BOLD,
+            fg_color="#7E57C2",
+            hover_color="#5E35B1",
+            width=120
+        )
+        self.group_btn.pack(side="left", padx=5, pady=5)
+
+        self.collapse_btn = ctk.CTkButton(
+            self.control_frame,
+            text="جمع/باز کردن گروه",
+            command=self.pert_app.toggle_selected_group,
+            font=FONT_FA_BOLD,
+            fg_color="#5C6BC0",
+            hover_color="#3949AB",
+            width=140
+        )
+        self.collapse_btn.pack(side="left", padx=5, pady=5)
+
+        self.gantt_btn = ctk.CTkButton(
+            self.control_frame,
+            text="نمودار گانت",
+            command=self.pert_app.open_gantt_window,
+            font=FONT_FA_BOLD,
+            fg_color="#00897B",
+            hover_color="#00695C",
+            width=120
+        )
+        self.gantt_btn.pack(side="left", padx=5, pady=5)
+
+        self.baseline_btn = ctk.CTkButton(
+            self.control_frame,
+            text="ذخیره مبنا",
+            command=self.save_baseline,
+            font=FONT_FA_BOLD,
+            fg_color="#607D8B",
+            hover_color="#455A64",
+            width=100
+        )
+        self.baseline_btn.pack(side="left", padx=5, pady=5)
+
+        self.diff_btn = ctk.CTkButton(
+            self.control_frame,
+            text="مقایسه با مبنا",
+            command=self.toggle_diff,
+            font=FONT_FA_BOLD,
+            fg_color="#FF9800",
+            hover_color="#F57C00",
+            width=120
+        )
+        self.diff_btn.pack(side="left", padx=5, pady=5)
+
         self.edge_mode = False
         self.edge_start_node = None
         self.temp_line = None
+        self.diff = None
+        self.diff_pending = False
+        self.baseline = None
 
         self.canvas.bind("<ButtonPress-1>", self.canvas_click)
+        self.canvas.tag_bind("days", "<Double-Button-1>", self.edit_days)
+        self.canvas.tag_bind("edge_line", "<ButtonPress-1>", self.select_edge_at)
 
     def toggle_edge_mode(self):
         self.edge_mode = not self.edge_mode
@@ -724,11 +1889,7 @@ class GraphWindow:
                             title="مدت زمان یال"
                         ).get_input()
                         if days and days.isdigit():
-                            new_edge = Edge(
-                                self.canvas, self.edge_start_node,
-                                clicked_node, days
-                            )
-                            self.pert_app.edges.append(new_edge)
+                            self.pert_app.add_edge(self.edge_start_node, clicked_node, days)
                     self.canvas.delete(self.temp_line)
                     self.toggle_edge_mode()
             elif self.temp_line and self.edge_start_node:
@@ -741,12 +1902,426 @@ class GraphWindow:
         if self.pert_app.selected_node:
             self.pert_app.delete_node(self.pert_app.selected_node)
 
+    def group_selected(self):
+        node = self.pert_app.selected_node
+        if node is None or node.summary_of is not None:
+            return
+        path = ctk.CTkInputDialog(
+            text="نام گروه را وارد کنید (زیرگروه‌ها با / جدا شوند):",
+            title="گروه‌بندی"
+        ).get_input()
+        if path is None:
+            return
+        names = [name.strip() for name in path.split('/') if name.strip()]
+        self.pert_app.assign_group(node, names)
+
+    def edge_at_current(self, attr):
+        """The real edge whose item (or whose proxy's item) is under the mouse"""
+        item = self.canvas.find_withtag("current")
+        if not item:
+            return None
+        for edge in self.pert_app.edges:
+            if item[0] in (getattr(edge, attr), edge.proxy and getattr(edge.proxy, attr)):
+                return edge
+        return None
+
+    def select_edge_at(self, event):
+        if self.edge_mode:
+            return
+        edge = self.edge_at_current("line_id")
+        if edge is not None:
+            self.pert_app.select_edge(edge)
+
+    def edit_days(self, event):
+        edge = self.edge_at_current("text_id")
+        if edge is None:
+            return
+        days = ctk.CTkInputDialog(
+            text="تعداد روزها را وارد کنید:",
+            title="مدت زمان یال"
+        ).get_input()
+        if days and days.isdigit():
+            self.pert_app.set_edge_days(edge, days)
+
+    def save_baseline(self):
+        self.pert_app.save_baseline()
+        tkinter.messagebox.showinfo(title='مبنا', message='برنامه فعلی به عنوان مبنا ذخیره شد')
+
+    def toggle_diff(self):
+        if self.diff is not None:
+            self.diff = None
+            self.baseline = None
+            self.canvas.delete("diff_overlay")
+            return
+        baseline = self.pert_app.load_baseline()
+        if baseline is None:
+            tkinter.messagebox.showwarning(title='خطای مبنا', message='ابتدا یک مبنا ذخیره کنید')
+            return
+        self.baseline = baseline
+        self.diff = diff_projects(baseline, self.pert_app.export_state())
+        self.draw_diff()
+
+    def request_diff_refresh(self):
+        """Recomputes the open comparison once Tk is idle, after a batch of edits"""
+        if self.diff is not None and not self.diff_pending:
+            self.diff_pending = True
+            self.top.after_idle(self.refresh_diff)
+
+    def refresh_diff(self):
+        self.diff_pending = False
+        if self.diff is None:
+            return
+        self.diff = diff_projects(self.baseline, self.pert_app.export_state())
+        self.draw_diff()
+
+    def draw_diff(self):
+        """Overlays the baseline comparison on the edges that are currently drawn"""
+        self.canvas.delete("diff_overlay")
+        diff = self.diff
+        edges = {edge.uid: edge for edge in self.pert_app.edges}
+        nodes = {node.uid: node for node in self.pert_app.nodes}
+
+
+        def shown_edge(uid):
+            edge = edges.get(uid)
+            if edge is not None and edge.line_id is None:
+                edge = edge.proxy
+            return edge if edge is not None and edge.line_id is not None else None
+
+
+        marks = [(uid, "#00E676", None) for uid in diff.added]
+        marks += [(uid, "#FF9800", None) for uid in diff.changed]
+        marks += [(diff.matched.get(uid), "#B388FF", (2, 4)) for uid in diff.left_critical]
+        marks += [(uid, "#FF1744", (6, 3)) for uid in diff.became_critical]
+        for uid, color, dash in marks:
+            shown = shown_edge(uid)
+            if shown is None:
+                continue
+            self.canvas.create_line(
+                *[coord for point in shown.curve_points for coord in point],
+                width=10, fill=color, smooth=True, dash=dash, tags=("diff_overlay",)
+            )
+
+
+        # Day deltas and float shifts are written just above the day label.
+        for uid in set(diff.changed) | set(diff.slack_shift):
+            shown = shown_edge(uid)
+            if shown is None:
+                continue
+            parts = []
+            delta = diff.changed.get(uid)
+            if delta:
+                parts.append(f"{delta:+d}")
+            if uid in diff.slack_shift:
+                old, new = diff.slack_shift[uid]
+                parts.append(f"شناوری {old}→{new}")
+            if not parts:
+                continue
+            x, y = shown.label_anchor()[:2]
+            self.canvas.create_text(
+                x, y - 18, text="  ".join(parts), fill="#FF9800" if delta else "#42A5F5",
+                font=FONT_FA_BOLD, tags=("diff_overlay",)
+            )
+
+
+        # Removed activities are ghosted between their nodes where those still exist;
+        # the ones that were critical in the baseline get the left-critical colour.
+        left_critical = set(diff.left_critical)
+        for uid in diff.removed:
+            data = self.baseline.edges[uid]
+            ends = []
+            for key in ("start", "end"):
+                node = nodes.get(diff.node_map.get(data[key]))
+                if node is not None:
+                    node = self.pert_app.visible_node(node)
+                    ends.append((node.x, node.y))
+                else:
+                    base_node = self.baseline.nodes.get(data[key])
+                    ends.append((base_node["x"], base_node["y"]) if base_node else None)
+            if None in ends or ends[0] == ends[1]:
+                continue
+            self.canvas.create_line(
+                *ends[0], *ends[1], width=3, fill="#B388FF" if uid in left_critical else "#9E9E9E",
+                dash=(4, 4), arrow=tk.LAST, tags=("diff_overlay",)
+            )
+
+
+        summary = (
+            f"افزوده: {len(diff.added)}   حذف‌شده: {len(diff.removed)}   تغییر‌یافته: {len(diff.changed)}\n"
+            f"تغییر مدت پروژه: {diff.duration_delta:+d} روز\n"
+            f"بحرانی‌شده: {len(diff.became_critical)}   خارج از مسیر بحرانی: {len(diff.left_critical)}"
+        )
+        self.canvas.create_text(
+            10, 10, text=summary, anchor="nw", fill="white",
+            font=FONT_FA, tags=("diff_overlay",)
+        )
+        self.canvas.tag_lower("diff_overlay")
+
     def on_close(self):
 
+        if not self.pert_app.save_before_close():
+            return
+        if self.pert_app.gantt_window is not None:
+            self.pert_app.gantt_window.on_close()
+        self.diff = None
+        self.pert_app.reset_project()
         Edge.edge_groups = {}
         self.top.destroy()
 
 
+class GanttWindow:
+    """Time-scaled activity view; only the rows and ticks inside the viewport have canvas items"""
+
+    ROW_HEIGHT = 26
+    HEADER_HEIGHT = 30
+    LABEL_WIDTH = 180
+    DAY_WIDTH = 24
+    TICK_STEPS = (1, 2, 5, 7, 10, 14, 30, 60, 90, 180, 365)
+
+    def __init__(self, pert_app):
+        self.pert_app = pert_app
+        self.top = ctk.CTkToplevel()
+        self.top.title("نمودار گانت")
+        self.top.geometry("1000x600")
+        self.top.protocol("WM_DELETE_WINDOW", self.on_close)
+
+
+        self.top.grid_rowconfigure(0, weight=1)
+        self.top.grid_columnconfigure(0, weight=1)
+
+
+        self.container = ctk.CTkFrame(self.top)
+        self.container.grid(row=0, column=0, sticky="nsew")
+        self.container.grid_rowconfigure(0, weight=1)
+        self.container.grid_columnconfigure(0, weight=1)
+
+
+        self.canvas = tk.Canvas(
+            self.container,
+            bg="#2B2B2B",
+            highlightthickness=0
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+
+        self.v_scroll = ctk.CTkScrollbar(self.container, orientation="vertical", command=self.on_vscroll)
+        self.v_scroll.grid(row=0, column=1, sticky="ns")
+        self.h_scroll = ctk.CTkScrollbar(self.container, orientation="horizontal", command=self.on_hscroll)
+        self.h_scroll.grid(row=1, column=0, sticky="ew")
+
+
+        self.rows = []
+        self.row_of = {}
+        self.duration = 0
+        self.schedule = None
+        self.x_offset = 0
+        self.y_offset = 0
+        self.row_pool = []
+        self.tick_pool = []
+        self.reload_pending = False
+
+
+        self.label_bg = self.canvas.create_rectangle(0, 0, 0, 0, fill="#242424", width=0)
+        self.header_bg = self.canvas.create_rectangle(0, 0, 0, 0, fill="#1E1E1E", width=0)
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<ButtonPress-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Shift-MouseWheel>", lambda e: self.on_wheel(e, horizontal=True))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_rows(3))
+
+        self.reload()
+
+    def request_reload(self):
+        """Coalesces several edits into one reload once Tk is idle"""
+        if not self.reload_pending:
+            self.reload_pending = True
+            self.top.after_idle(self.reload)
+
+    def reload(self):
+        self.reload_pending = False
+        schedule = self.pert_app.root_group.schedule()
+        if schedule is not self.schedule:
+            self.schedule = schedule
+            rows = []
+            for edge in self.pert_app.edges:
+                if edge.start_node in schedule.cyclic or edge.end_node in schedule.cyclic:
+                    continue
+                days = int(edge.days)
+                es = schedule.earliest[edge.start_node]
+                lf = schedule.latest[edge.end_node]
+                rows.append((es, lf - days, edge, es + days, lf))
+            rows.sort(key=lambda row: (row[0], row[1]))
+            self.rows = [(edge, es, ef, ls, lf) for es, ls, edge, ef, lf in rows]
+            self.row_of = {row[0]: index for index, row in enumerate(self.rows)}
+            self.duration = schedule.duration
+        self.redraw()
+
+    def day_x(self, day):
+        return self.LABEL_WIDTH + day * self.DAY_WIDTH - self.x_offset
+
+    def create_row_items(self):
+        return {
+            "bg": self.canvas.create_rectangle(0, 0, 0, 0, width=0, tags=("gantt_rowbg",)),
+            "float": self.canvas.create_line(0, 0, 0, 0, fill="#9E9E9E", width=2),
+            "late": self.canvas.create_rectangle(0, 0, 0, 0, outline="#FFD700", dash=(4, 2)),
+            "early": self.canvas.create_rectangle(0, 0, 0, 0, width=0),
+            "label": self.canvas.create_text(
+                0, 0, anchor="e", fill="white", font=("B Nazanin", 12), tags=("gantt_label",)
+            ),
+        }
+
+    def create_tick_items(self):
+        return (
+            self.canvas.create_line(0, 0, 0, 0, fill="#3C3C3C", tags=("gantt_grid",)),
+            self.canvas.create_text(0, 0, fill="#BDBDBD", font=("B Nazanin", 11), tags=("gantt_tick",)),
+        )
+
+    def redraw(self):
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        body = max(height - self.HEADER_HEIGHT, 0)
+        total_height = len(self.rows) * self.ROW_HEIGHT
+        total_width = (self.duration + 1) * self.DAY_WIDTH
+        view_width = max(width - self.LABEL_WIDTH, 1)
+        self.y_offset = max(0, min(self.y_offset, total_height - body))
+        self.x_offset = max(0, min(self.x_offset, total_width - view_width))
+
+
+        # Rows: the pool only ever grows to the number of rows that fit on screen.
+        first = int(self.y_offset // self.ROW_HEIGHT)
+        visible = body // self.ROW_HEIGHT + 2
+        while len(self.row_pool) < visible:
+            self.row_pool.append(self.create_row_items())
+        for slot, items in enumerate(self.row_pool):
+            index = first + slot
+            if slot < visible and index < len(self.rows):
+                top = self.HEADER_HEIGHT + index * self.ROW_HEIGHT - self.y_offset
+                self.draw_row(items, index, top, width)
+            else:
+                for item in items.values():
+                    self.canvas.itemconfig(item, state="hidden")
+
+
+        step = next((s for s in self.TICK_STEPS if s * self.DAY_WIDTH >= 60), self.TICK_STEPS[-1])
+        day = math.ceil(self.x_offset / self.DAY_WIDTH / step) * step
+        slot = 0
+        while self.day_x(day) <= width:
+            if slot == len(self.tick_pool):
+                self.tick_pool.append(self.create_tick_items())
+            line, text = self.tick_pool[slot]
+            x = self.day_x(day)
+            self.canvas.coords(line, x, self.HEADER_HEIGHT, x, height)
+            self.canvas.coords(text, x, self.HEADER_HEIGHT / 2)
+            self.canvas.itemconfig(line, state="normal")
+            self.canvas.itemconfig(text, text=str(day), state="normal")
+            day += step
+            slot += 1
+        for line, text in self.tick_pool[slot:]:
+            self.canvas.itemconfig(line, state="hidden")
+            self.canvas.itemconfig(text, state="hidden")
+
+
+        self.canvas.coords(self.label_bg, 0, 0, self.LABEL_WIDTH, height)
+        self.canvas.coords(self.header_bg, 0, 0, width, self.HEADER_HEIGHT)
+        self.canvas.tag_lower("gantt_grid")
+        self.canvas.tag_lower("gantt_rowbg")
+        self.canvas.tag_raise(self.label_bg)
+        self.canvas.tag_raise("gantt_label")
+        self.canvas.tag_raise(self.header_bg)
+        self.canvas.tag_raise("gantt_tick")
+
+
+        if total_height:
+            self.v_scroll.set(self.y_offset / total_height, min((self.y_offset + body) / total_height, 1))
+        else:
+            self.v_scroll.set(0, 1)
+        self.h_scroll.set(self.x_offset / total_width, min((self.x_offset + view_width) / total_width, 1))
+
+    def draw_row(self, items, index, top, width):
+        edge, es, ef, ls, lf = self.rows[index]
+        y1 = top + 5
+        y2 = top + self.ROW_HEIGHT - 5
+        mid = (y1 + y2) / 2
+        critical = ls == es
+
+        if edge is self.pert_app.selected_edge:
+            row_color = "#4A4A7A"
+        else:
+            row_color = "#323232" if index % 2 else "#2B2B2B"
+        self.canvas.coords(items["bg"], 0, top, width, top + self.ROW_HEIGHT)
+        self.canvas.itemconfig(items["bg"], fill=row_color, state="normal")
+
+        self.canvas.coords(items["early"], self.day_x(es), y1, self.day_x(ef), y2)
+        self.canvas.itemconfig(items["early"], fill="#F44336" if critical else "#4169E1", state="normal")
+
+        self.canvas.coords(items["late"], self.day_x(ls), y1, self.day_x(lf), y2)
+        self.canvas.itemconfig(items["late"], state="hidden" if critical else "normal")
+
+        self.canvas.coords(items["float"], self.day_x(ef), mid, self.day_x(lf), mid)
+        self.canvas.itemconfig(items["float"], state="hidden" if critical else "normal")
+
+        self.canvas.coords(items["label"], self.LABEL_WIDTH - 8, (top + top + self.ROW_HEIGHT) / 2)
+        self.canvas.itemconfig(
+            items["label"], state="normal",
+            text=f"{edge.start_node.text} - {edge.end_node.text} ({ls - es})"
+        )
+
+    def show_edge(self, edge):
+        """Scrolls edge's row into view if needed and repaints the selection"""
+        index = self.row_of.get(edge)
+        if index is not None:
+            body = self.canvas.winfo_height() - self.HEADER_HEIGHT
+            top = index * self.ROW_HEIGHT
+            if top < self.y_offset or top + self.ROW_HEIGHT > self.y_offset + body:
+                self.y_offset = top - body / 2
+        self.redraw()
+
+    def on_click(self, event):
+        if event.y < self.HEADER_HEIGHT:
+            return
+        index = int((event.y - self.HEADER_HEIGHT + self.y_offset) // self.ROW_HEIGHT)
+        if 0 <= index < len(self.rows):
+            self.pert_app.select_edge(self.rows[index][0])
+
+    def scroll_rows(self, count):
+        self.y_offset += count * self.ROW_HEIGHT
+        self.redraw()
+
+    def on_wheel(self, event, horizontal=False):
+        steps = -1 if event.delta > 0 else 1
+        if horizontal:
+            self.x_offset += steps * 3 * self.DAY_WIDTH
+            self.redraw()
+        else:
+            self.scroll_rows(steps * 3)
+
+    def scroll_command(self, args, offset, total, page):
+        if args[0] == "moveto":
+            return float(args[1]) * total
+        if args[0] == "scroll":
+            amount = int(args[1])
+            return offset + amount * (page if args[2] == "pages" else page / 10)
+        return offset
+
+    def on_vscroll(self, *args):
+        body = self.canvas.winfo_height() - self.HEADER_HEIGHT
+        total = len(self.rows) * self.ROW_HEIGHT
+        self.y_offset = self.scroll_command(args, self.y_offset, total, body)
+        self.redraw()
+
+    def on_hscroll(self, *args):
+        view = self.canvas.winfo_width() - self.LABEL_WIDTH
+        total = (self.duration + 1) * self.DAY_WIDTH
+        self.x_offset = self.scroll_command(args, self.x_offset, total, view)
+        self.redraw()
+
+    def on_close(self):
+        self.pert_app.gantt_window = None
+        self.top.destroy()
+
+
 if __name__ == "__main__":
     app = PERTApp()
-    app.root.mainloop()
\ No newline at end of file
+    app.root.mainloop()
+    app.journal.close()
\ No newline at end of file